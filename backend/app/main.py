@@ -6,28 +6,77 @@
 #              Sun/Moon cycles, Lunar phases) based on user location.
 #
 # Requirements:
-#   pip install fastapi uvicorn ephem
+#   pip install fastapi uvicorn ephem httpx cachetools skyfield
 #
 # Usage:
 #   Run the server: uvicorn astro_backend:app --reload
 #   Access docs:    http://127.0.0.1:8000/docs
 # ------------------------------------------------------------------------------
 
-from datetime import datetime, date
-from fastapi import FastAPI, HTTPException, Query
+from cachetools import TTLCache
+from cachetools.func import ttl_cache
+from contextlib import asynccontextmanager
+from datetime import datetime, date, timedelta, timezone
+from functools import lru_cache
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, TypeAdapter
+from skyfield.api import Loader, wgs84
+from skyfield.errors import EphemerisRangeError
 from typing import Optional, Dict, List
-from geopy.geocoders import Nominatim
+import anyio.to_thread
+import asyncio
+import bisect
 import ephem
+import heapq
+import httpx
 import math
-import requests
+import numpy as np
+import os
+import threading
+
+# Shared async HTTP client for Nominatim, opened/closed with the app lifespan.
+# Keeping one client keeps connections (and their TLS sessions) alive between
+# lookups instead of handshaking with Nominatim on every request.
+_HTTP: Optional[httpx.AsyncClient] = None
+
+# Skyfield timescale and JPL DE421 ephemeris for the vectorized calendar,
+# loaded on the first /astro-calendar request (see get_skyfield). The kernel
+# is downloaded into SKYFIELD_DATA if missing (the Docker image ships it
+# pre-downloaded). Nothing else in the API depends on it.
+_SKYFIELD_DATA = os.environ.get("SKYFIELD_DATA", "skyfield-data")
+_SKYFIELD = None
+_SKYFIELD_LOCK = threading.Lock()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _HTTP
+    # Sync (CPU-bound) endpoints run in this threadpool, allow more at once
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 100
+    _HTTP = httpx.AsyncClient(
+        base_url="https://nominatim.openstreetmap.org",
+        headers={"User-Agent": "astro_grimoire_app/1.0"},
+        timeout=10,
+        transport=httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=8),
+            retries=2,  # Retry failed connection attempts
+        ),
+    )
+    try:
+        yield
+    finally:
+        await _HTTP.aclose()
+        _HTTP = None
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="AstroCalc API",
     description="API for calculating solstices, lunar phases, and celestial rise/set times.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -42,6 +91,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (search results, calendars) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
+# Geocoding results cache. Users tend to look up the same places over and over,
+# so answers are kept for an hour instead of asking Nominatim again. Concurrent
+# misses on the same key share one in-flight lookup (see _coalesce), keeping
+# within Nominatim's usage policy. Everything runs on the event loop, so the
+# caches themselves need no locking.
+_SEARCH_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+_REVERSE_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+_INFLIGHT: Dict[tuple, asyncio.Task] = {}
+
+# Observer atmosphere and rise/set horizon used for all calculations
+_OBSERVER_PRESSURE = 1013.25  # Standard pressure for refraction
+_OBSERVER_HORIZON = "-0:34"  # Standard sunrise/sunset definition (34 arcminutes below horizon)
+
+# Calendar sampling: altitudes every 10 minutes, rise/set is where the
+# geometric altitude of the body's center crosses the horizon below. Each
+# crossing is then refined with a few false position steps.
+_CALENDAR_STEP_MINUTES = 10
+_CALENDAR_REFINE_STEPS = 3
+_CALENDAR_MAX_DAYS = 366
+
+
+def _calendar_horizon(radius_deg: float) -> float:
+    """
+    Returns the geometric altitude (degrees) at which ephem reports a rise/set
+    for a body of the given apparent radius, so the calendar matches /astro-data.
+    """
+    horizon = ephem.degrees(_OBSERVER_HORIZON) - math.radians(radius_deg)
+    return math.degrees(ephem.unrefract(_OBSERVER_PRESSURE, 15.0, horizon))
+
+
+# Horizons for apparent radii covering both the Sun and the Moon, interpolated
+# per instant. The body radii (km) are the ones ephem uses.
+_CALENDAR_RADII = np.linspace(0.24, 0.29, 6)
+_CALENDAR_HORIZONS = np.array([_calendar_horizon(r) for r in _CALENDAR_RADII])
+_CALENDAR_BODY_RADIUS_KM = {"sun": 695990.0, "moon": 1740.0}
+
+# Reusable celestial bodies. A body only holds the state of its last
+# compute() call, so there is no need to allocate new ones per request.
+# compute() mutates the body, so every thread gets its own instances.
+_BODIES = threading.local()
+
+# Moon phase lookup: upper bounds (exclusive) of the Sun-Moon longitude
+# separation in degrees, and the phase name for each resulting bucket.
+_PHASE_BOUNDS = (10, 85, 95, 175, 185, 265, 275, 350)
+_PHASE_NAMES = (
+    "New Moon",
+    "Waxing Crescent",
+    "First Quarter",
+    "Waxing Gibbous",
+    "Full Moon",
+    "Waning Gibbous",
+    "Last Quarter",
+    "Waning Crescent",
+    "New Moon",
+)
+# _PHASE_NAMES index for every whole degree of separation (the bounds are whole
+# degrees, so flooring the separation never changes its bucket)
+_PHASE_TABLE = bytes(bisect.bisect_right(_PHASE_BOUNDS, d) for d in range(360))
+
 # ------------------------------------------------------------------------------
 # Data Models
 # ------------------------------------------------------------------------------
@@ -76,6 +187,12 @@ class MoonPhaseData(BaseModel):
     age_days: float
 
 
+class CalendarDay(BaseModel):
+    date: str
+    sun_times: CelestialBodyTimes
+    moon_times: CelestialBodyTimes
+
+
 class AstroResponse(BaseModel):
     location: Dict[str, float]
     current_date: str
@@ -85,6 +202,9 @@ class AstroResponse(BaseModel):
     solstices_current_year: SolsticeData
 
 
+_ASTRO_RESPONSE = TypeAdapter(AstroResponse)
+
+
 # ------------------------------------------------------------------------------
 # Helper Functions
 # ------------------------------------------------------------------------------
@@ -95,6 +215,22 @@ def get_hemisphere(lat: float) -> str:
     return "Northern" if lat >= 0 else "Southern"
 
 
+def parse_date(date_str: str) -> datetime:
+    """
+    Parses a YYYY-MM-DD string into a datetime at midnight.
+    Slices the fixed-width fields directly, much faster than strptime.
+    """
+    if (
+        len(date_str) != 10
+        or date_str[4] != "-"
+        or date_str[7] != "-"
+        or not (date_str[0:4] + date_str[5:7] + date_str[8:10]).isdigit()
+    ):
+        raise ValueError(f"Invalid date '{date_str}', expected YYYY-MM-DD")
+    # datetime() itself rejects out-of-range months and days
+    return datetime(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]))
+
+
 def format_ephem_date(ephem_date) -> str:
     """Converts ephem date object to ISO format string with UTC suffix."""
     try:
@@ -105,6 +241,197 @@ def format_ephem_date(ephem_date) -> str:
         return None
 
 
+def get_body(kind):
+    """Returns the calling thread's reusable instance of an ephem body class."""
+    body = getattr(_BODIES, kind.__name__, None)
+    if body is None:
+        body = kind()
+        setattr(_BODIES, kind.__name__, body)
+    return body
+
+
+def get_times_precise(body, obs) -> dict:
+    """
+    Returns the first rise and set of the body after the observer's date.
+    The observer's date is left unchanged, so one observer can be reused.
+    """
+    data = {
+        "rise": None,
+        "set": None,
+        "is_always_up": False,
+        "is_always_down": False,
+    }
+    try:
+        # next_rising gives the first rising AFTER the observer's date
+        data["rise"] = format_ephem_date(obs.next_rising(body))
+        # next_setting gives the first setting AFTER the observer's date
+        data["set"] = format_ephem_date(obs.next_setting(body))
+
+    except ephem.AlwaysUpError:
+        data["is_always_up"] = True
+    except ephem.NeverUpError:
+        data["is_always_down"] = True
+    except Exception:
+        pass
+    return data
+
+
+def get_skyfield():
+    """
+    Returns the Skyfield (timescale, ephemeris, first_date, last_date), loading
+    the DE421 kernel on first use. first_date/last_date are the UTC days the
+    kernel fully covers. A failed load is not cached, the next call retries.
+    """
+    global _SKYFIELD
+    with _SKYFIELD_LOCK:
+        if _SKYFIELD is None:
+            load = Loader(_SKYFIELD_DATA, verbose=False)
+            ts = load.timescale()
+            eph = load("de421.bsp")
+
+            # Coverage of each center -> target pair, then what all pairs share
+            coverage = {}
+            for segment in eph.segments:
+                spk = segment.spk_segment
+                first, last = coverage.get((segment.center, segment.target), (spk.start_jd, spk.end_jd))
+                coverage[(segment.center, segment.target)] = (
+                    min(first, spk.start_jd), max(last, spk.end_jd)
+                )
+            start_jd = max(first for first, _ in coverage.values())
+            end_jd = min(last for _, last in coverage.values())
+
+            # Keep a day of margin on both ends for partial days and light time
+            first_date = (ts.tdb_jd(start_jd).utc_datetime() + timedelta(days=1)).date()
+            last_date = (ts.tdb_jd(end_jd).utc_datetime() - timedelta(days=2)).date()
+            _SKYFIELD = (ts, eph, first_date, last_date)
+    return _SKYFIELD
+
+
+def _calendar_height(observer, body, radius_km: float):
+    """
+    Returns the geometric altitude (degrees) of the body above its rise/set
+    horizon, seen from a topocentric Skyfield position. Like ephem's, the
+    horizon follows the body's current apparent radius.
+    """
+    alt, _, distance = observer.observe(body).apparent().altaz()
+    radius = np.degrees(np.arcsin(radius_km / distance.km))
+    return alt.degrees - np.interp(radius, _CALENDAR_RADII, _CALENDAR_HORIZONS)
+
+
+def get_calendar_times(h, height, start: datetime, days: int) -> List[dict]:
+    """
+    Derives the daily rise/set times from h, the body's altitude above its
+    horizon sampled every _CALENDAR_STEP_MINUTES from start, and height(m),
+    which evaluates it at any m minutes after start. Crossings are bracketed
+    by sign changes between samples and by the vertex of every local
+    extremum, so a dip across the horizon shorter than a step is not missed.
+    All brackets are then narrowed together with _CALENDAR_REFINE_STEPS
+    false position steps.
+    """
+    step = float(_CALENDAR_STEP_MINUTES)
+    grid = np.arange(len(h)) * step
+    above = h > 0
+
+    # Indices i where the body crosses the horizon between sample i and i+1
+    i = np.flatnonzero(above[:-1] != above[1:])
+    lo, f_lo, hi, f_hi = grid[i], h[i], grid[i + 1], h[i + 1]
+
+    # Samples j at a local extremum, evaluated again at the vertex of the
+    # parabola through j-1, j and j+1
+    j = np.flatnonzero((h[1:-1] - h[:-2]) * (h[2:] - h[1:-1]) < 0) + 1
+    j = j[(above[j - 1] == above[j]) & (above[j] == above[j + 1])]
+    if j.size:
+        offset = (h[j - 1] - h[j + 1]) / (2 * (h[j - 1] - 2 * h[j] + h[j + 1]))
+        vertex = grid[j] + offset * step
+        f_vertex = height(vertex)
+        dip = (f_vertex > 0) != above[j]
+        j, vertex, f_vertex = j[dip], vertex[dip], f_vertex[dip]
+        # Two crossings, one on each side of the vertex
+        lo = np.concatenate((lo, grid[j - 1], vertex))
+        f_lo = np.concatenate((f_lo, h[j - 1], f_vertex))
+        hi = np.concatenate((hi, vertex, grid[j + 1]))
+        f_hi = np.concatenate((f_hi, f_vertex, h[j + 1]))
+
+    setting = f_lo > 0
+    if lo.size:
+        moved_lo = np.zeros(lo.size, dtype=bool)
+        moved_hi = np.zeros(lo.size, dtype=bool)
+        for _ in range(_CALENDAR_REFINE_STEPS):
+            x = lo - f_lo * (hi - lo) / (f_hi - f_lo)
+            f_x = height(x)
+            left = (f_x > 0) == (f_lo > 0)
+            # Illinois: halve the value of an end that stays put twice in a row
+            f_hi = np.where(left & moved_lo, f_hi / 2, f_hi)
+            f_lo = np.where(~left & moved_hi, f_lo / 2, f_lo)
+            lo, f_lo = np.where(left, x, lo), np.where(left, f_x, f_lo)
+            hi, f_hi = np.where(left, hi, x), np.where(left, f_hi, f_x)
+            moved_lo, moved_hi = left, ~left
+    minutes = lo - f_lo * (hi - lo) / (f_hi - f_lo)
+
+    result = [
+        {"rise": None, "set": None, "is_always_up": False, "is_always_down": False}
+        for _ in range(days)
+    ]
+    order = np.argsort(minutes)
+    for minute, is_set in zip(minutes[order].tolist(), setting[order].tolist()):
+        day = int(minute // 1440)
+        if day >= days:
+            continue
+        key = "set" if is_set else "rise"
+        if result[day][key] is None:
+            result[day][key] = (start + timedelta(minutes=minute)).isoformat() + "Z"
+
+    # Days without any crossing are spent entirely above or below the horizon
+    samples_per_day = 1440 // _CALENDAR_STEP_MINUTES
+    for day, data in enumerate(result):
+        if data["rise"] is None and data["set"] is None:
+            if above[day * samples_per_day]:
+                data["is_always_up"] = True
+            else:
+                data["is_always_down"] = True
+    return result
+
+
+def _phase_calc(sun_lon: float, moon_lon: float) -> tuple[int, float]:
+    """
+    Returns the _PHASE_NAMES index and the approximate age (days) of the Moon
+    from the Sun and Moon longitudes in radians.
+    """
+    # To determine Waxing/Waning, we check the difference between Sun and Moon longitude
+    # angular separation, normalized to 0-2pi
+    degree_sep = math.degrees((moon_lon - sun_lon) % (2 * math.pi))
+    return _PHASE_TABLE[int(degree_sep) % 360], degree_sep / 360 * 29.53
+
+
+async def _coalesce(key: tuple, fetch):
+    """
+    Awaits fetch() at most once for concurrent callers with the same key.
+    The shared task is shielded, so one caller disconnecting does not
+    cancel the lookup for the others.
+    """
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    return await asyncio.shield(task)
+
+
+@lru_cache(maxsize=8)
+def _solstices(year: int) -> tuple[str, str]:
+    """
+    Returns the June and December solstices of the given year as ISO strings.
+    Depends only on the year, so it is computed once per year and cached.
+    """
+    # ephem.next_solstice finds the next one from a given date.
+    # To find specific seasonal solstices, we look around standard months.
+    # June Solstice (Summer in North, Winter in South) ~ June 21
+    # December Solstice (Winter in North, Summer in South) ~ Dec 21
+    june = ephem.next_solstice(date(year, 6, 1))
+    december = ephem.next_solstice(date(year, 12, 1))
+    return format_ephem_date(june), format_ephem_date(december)
+
+
 def get_moon_phase_name(lunation: float) -> str:
     """
     Returns the moon phase name based on lunation value (0-1).
@@ -140,8 +467,17 @@ async def search_location(
     """
     Search for a location by name and return coordinates with details.
     """
+    cache_key = q.strip().lower()
+    cached = _SEARCH_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    return await _coalesce(("search", cache_key), lambda: _fetch_search(q, cache_key))
+
+
+async def _fetch_search(q: str, cache_key: str) -> List[LocationResult]:
+    """Queries Nominatim for /search-location and caches the filtered results."""
     try:
-        url = "https://nominatim.openstreetmap.org/search"
         params = {
             "q": q,
             "format": "json",
@@ -150,15 +486,13 @@ async def search_location(
             "dedupe": 0,  # Ensure we get duplicates/variants
             "accept-language": "en"
         }
-        headers = {
-            "User-Agent": "astro_grimoire_app/1.0"
-        }
-        
-        resp = requests.get(url, params=params, headers=headers)
+
+        resp = await _HTTP.get("/search", params=params)
         resp.raise_for_status()
         locations = resp.json()
 
         if not locations:
+            _SEARCH_CACHE[cache_key] = []
             return []
 
         candidates = []
@@ -181,22 +515,23 @@ async def search_location(
             # Store result with importance for sorting
             importance = loc.get("importance", 0)
             
-            result_obj = LocationResult(
-                name=place_name,
-                display_name=loc.get("display_name"),
-                lat=float(loc.get("lat")),
-                lon=float(loc.get("lon")),
-                country=address.get("country"),
-                state=address.get("state") or address.get("region"),
-                city=city or town or village
-            )
-            candidates.append((importance, result_obj))
-        
-        # Sort by importance descending
-        candidates.sort(key=lambda x: x[0], reverse=True)
-
-        # Return top 30 filtered results
-        return [c[1] for c in candidates[:30]]
+            # Keep plain dicts here, only the survivors become LocationResult
+            candidates.append((importance, {
+                "name": place_name,
+                "display_name": loc.get("display_name"),
+                "lat": float(loc.get("lat")),
+                "lon": float(loc.get("lon")),
+                "country": address.get("country"),
+                "state": address.get("state") or address.get("region"),
+                "city": city or town or village,
+            }))
+
+        # Pick the top 30 by importance (descending) without sorting them all
+        top = heapq.nlargest(30, candidates, key=lambda x: x[0])
+
+        results = [LocationResult(**c[1]) for c in top]
+        _SEARCH_CACHE[cache_key] = results
+        return results
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Geocoding error: {str(e)}")
@@ -210,14 +545,37 @@ async def reverse_geocode(
     """
     Find location details from coordinates.
     """
+    # Coordinates within ~100 m resolve to the same place, share one cache entry
+    cache_key = (round(lat, 3), round(lon, 3))
+    result = _REVERSE_CACHE.get(cache_key)
+    if result is None:
+        result = await _coalesce(
+            ("reverse", cache_key), lambda: _fetch_reverse(lat, lon, cache_key)
+        )
+    return result.model_copy(update={"lat": lat, "lon": lon})
+
+
+async def _fetch_reverse(lat: float, lon: float, cache_key: tuple) -> LocationResult:
+    """Queries Nominatim for /reverse-geocode and caches the result."""
     try:
-        geolocator = Nominatim(user_agent="astro_grimoire_app")
-        location = geolocator.reverse((lat, lon), language="en", addressdetails=True)
+        params = {
+            "lat": lat,
+            "lon": lon,
+            "format": "json",
+            "addressdetails": 1,
+            "accept-language": "en"
+        }
+
+        resp = await _HTTP.get("/reverse", params=params)
+        resp.raise_for_status()
+        location = resp.json()
 
-        if not location:
+        # Nominatim answers unknown coordinates with {"error": "..."}
+        if not location or "error" in location:
             raise HTTPException(status_code=404, detail="Location not found")
 
-        address = location.raw.get("address", {})
+        address = location.get("address", {})
+        display_name = location.get("display_name", "")
         country = address.get("country")
         state = address.get("state") or address.get("region")
         
@@ -225,25 +583,116 @@ async def reverse_geocode(
         city = address.get("city") or address.get("town") or address.get("village") or address.get("hamlet")
         
         # Determine a short name
-        short_name = city if city else location.address.split(",")[0]
+        short_name = city if city else display_name.split(",")[0]
 
-        return LocationResult(
+        result = LocationResult(
             name=short_name,
-            display_name=location.address,
+            display_name=display_name,
             lat=lat,
             lon=lon,
             country=country,
             state=state,
             city=city
         )
+        _REVERSE_CACHE[cache_key] = result
+        return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Geocoding error: {str(e)}")
 
 
 
+@ttl_cache(maxsize=4096, ttl=3600)
+def _compute_astro(lat_q: int, lon_q: int, hemisphere: str, target_date: datetime) -> bytes:
+    """
+    Calculates the /astro-data response as JSON for a location given in
+    hundredths of a degree. Results are cached for an hour: observers within
+    ~1 km on the same date get practically the same data. The hemisphere
+    comes from the unrounded latitude, which may round to 0 from either side.
+    """
+    lat, lon = lat_q / 100, lon_q / 100
+
+    # 1. Setup Observer
+    observer = ephem.Observer()
+    # ephem takes floats as radians (strings as degrees), skip the parsing
+    observer.lat = math.radians(lat)
+    observer.lon = math.radians(lon)
+    observer.elevation = 0  # Default elevation
+    observer.pressure = _OBSERVER_PRESSURE
+    observer.horizon = _OBSERVER_HORIZON
+
+    # Hand ephem plain date tuples rather than datetime objects
+    jd_midnight = ephem.Date((target_date.year, target_date.month, target_date.day))
+    observer.date = ephem.Date((
+        target_date.year, target_date.month, target_date.day,
+        target_date.hour, target_date.minute,
+        target_date.second + target_date.microsecond / 1e6,
+    ))
+
+    # 2. Celestial Bodies
+    sun = get_body(ephem.Sun)
+    moon = get_body(ephem.Moon)
+
+    # Compute positions for the current time
+    sun.compute(observer)
+    moon.compute(observer)
+
+    # Read the position-dependent values now, the bodies are reused and
+    # recomputed for other dates later on.
+    # illumination is percentage (0-100)
+    illumination = moon.phase
+    sun_lon = sun.hlon
+    moon_lon = moon.hlon
+
+    # 3. Calculate Rise and Set times
+    # Strategy: Start the search at midnight (UTC) of the target date to
+    # find the rise/set times occurring on THIS specific day reliably.
+    # The positions above are read, so the same observer can be moved
+    # to midnight and shared by both searches.
+    observer.date = jd_midnight
+
+    sun_data = get_times_precise(sun, observer)
+    moon_data = get_times_precise(moon, observer)
+
+    # 4. Moon Phase Calculation
+    phase_index, age_days = _phase_calc(sun_lon, moon_lon)
+    phase_name = _PHASE_NAMES[phase_index]
+
+    # 5. Solstices for the current year
+    june_sol_date, december_sol_date = _solstices(target_date.year)
+
+    if hemisphere == "Northern":
+        summer_sol_date = june_sol_date
+        winter_sol_date = december_sol_date
+    else:
+        # Southern hemisphere logic
+        summer_sol_date = december_sol_date  # December is summer
+        winter_sol_date = june_sol_date  # June is winter
+
+    # 6. Construct Response
+    data = {
+        "location": {"lat": lat, "lon": lon},
+        "current_date": target_date.isoformat(),
+        "sun_times": sun_data,
+        "moon_times": moon_data,
+        "moon_phase": {
+            "phase_name": phase_name,
+            "illumination_percent": round(illumination, 1),
+            "age_days": round(age_days, 1),
+        },
+        "solstices_current_year": {
+            "summer_solstice": summer_sol_date,
+            "winter_solstice": winter_sol_date,
+            "hemisphere": hemisphere,
+        },
+    }
+    return _ASTRO_RESPONSE.dump_json(_ASTRO_RESPONSE.validate_python(data))
+
+
 @app.get("/astro-data", response_model=AstroResponse, tags=["Astronomy"])
-async def get_astro_data(
+def get_astro_data(
     lat: float = Query(
         ..., description="Latitude in decimal degrees"
     ),
@@ -257,142 +706,107 @@ async def get_astro_data(
     """
     Calculate astronomical data for a specific location and date.
     """
+    # Set date or use current UTC time
+    if date_str:
+        try:
+            target_date = parse_date(date_str)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        # Truncated to the minute so repeated "now" requests share a cache entry
+        target_date = datetime.now(timezone.utc).replace(tzinfo=None, second=0, microsecond=0)
+
     try:
-        # 1. Setup Observer
-        observer = ephem.Observer()
-        observer.lat = str(lat)
-        observer.lon = str(lon)
-        observer.elevation = 0  # Default elevation
-        observer.pressure = 1013.25 # Standard pressure for refraction
-        observer.horizon = '-0:34'  # Standard sunrise/sunset definition (34 arcminutes below horizon)
-
-        # Set date or use current UTC time
-        if date_str:
-            target_date = datetime.strptime(date_str, "%Y-%m-%d")
-        else:
-            target_date = datetime.utcnow()
-
-        observer.date = target_date
-
-        # 2. Celestial Bodies
-        sun = ephem.Sun()
-        moon = ephem.Moon()
-
-        # Compute positions for the current time
-        sun.compute(observer)
-        moon.compute(observer)
-
-        # 3. Calculate Rise and Set times
-        # Strategy: Set observer to noon of the target date to ensure we find 
-        # the rise/set times occurring on THIS specific day reliably.
-        noon_of_day = target_date.replace(hour=12, minute=0, second=0, microsecond=0)
-        
-        # We search backwards from noon for the rise and forwards from noon for the set
-        # of the current 24h period.
-        
-        def get_times_precise(body, obs_noon):
-            data = {
-                "rise": None,
-                "set": None,
-                "is_always_up": False,
-                "is_always_down": False,
-            }
-            try:
-                # To find the events for the current calendar day, 
-                # we search from midnight to midnight.
-                midnight = obs_noon.date - 0.5
-                obs_rising = ephem.Observer()
-                obs_rising.lat, obs_rising.lon, obs_rising.elevation = obs_noon.lat, obs_noon.lon, obs_noon.elevation
-                obs_rising.pressure, obs_rising.horizon = obs_noon.pressure, obs_noon.horizon
-                obs_rising.date = midnight
-                
-                # next_rising gives the first rising AFTER midnight
-                data["rise"] = format_ephem_date(obs_rising.next_rising(body))
-                # next_setting gives the first setting AFTER midnight
-                data["set"] = format_ephem_date(obs_rising.next_setting(body))
-                
-            except ephem.AlwaysUpError:
-                data["is_always_up"] = True
-            except ephem.AlwaysDownError:
-                data["is_always_down"] = True
-            except Exception:
-                pass
-            return data
-
-        sun_data = get_times_precise(ephem.Sun(), observer)
-        moon_data = get_times_precise(ephem.Moon(), observer)
-
-        # 4. Moon Phase Calculation
-        # illumination is percentage (0-100)
-        illumination = moon.phase
-
-        # To determine Waxing/Waning, we check the difference between Sun and Moon longitude
-        # angular separation
-        sun_lon = sun.hlon
-        moon_lon = moon.hlon
-        # Normalize to 0-2pi
-        sep = (moon_lon - sun_lon) % (2 * math.pi)
-        degree_sep = math.degrees(sep)
-
-        phase_name = ""
-        if degree_sep < 10:
-            phase_name = "New Moon"
-        elif degree_sep < 85:
-            phase_name = "Waxing Crescent"
-        elif degree_sep < 95:
-            phase_name = "First Quarter"
-        elif degree_sep < 175:
-            phase_name = "Waxing Gibbous"
-        elif degree_sep < 185:
-            phase_name = "Full Moon"
-        elif degree_sep < 265:
-            phase_name = "Waning Gibbous"
-        elif degree_sep < 275:
-            phase_name = "Last Quarter"
-        elif degree_sep < 350:
-            phase_name = "Waning Crescent"
-        else:
-            phase_name = "New Moon"
-
-        # 5. Solstices for the current year
-        current_year = target_date.year
-
-        # ephem.next_solstice finds the next one from a given date.
-        # To find specific seasonal solstices, we look around standard months.
-        # June Solstice (Summer in North, Winter in South) ~ June 21
-        # December Solstice (Winter in North, Summer in South) ~ Dec 21
-
-        d1 = ephem.next_solstice(date(current_year, 6, 1))
-        d2 = ephem.next_solstice(date(current_year, 12, 1))
-
-        hemisphere = get_hemisphere(lat)
-
-        if hemisphere == "Northern":
-            summer_sol_date = format_ephem_date(d1)
-            winter_sol_date = format_ephem_date(d2)
-        else:
-            # Southern hemisphere logic
-            summer_sol_date = format_ephem_date(d2)  # December is summer
-            winter_sol_date = format_ephem_date(d1)  # June is winter
-
-        # 6. Construct Response
-        return AstroResponse(
-            location={"lat": lat, "lon": lon},
-            current_date=target_date.isoformat(),
-            sun_times=CelestialBodyTimes(**sun_data),
-            moon_times=CelestialBodyTimes(**moon_data),
-            moon_phase=MoonPhaseData(
-                phase_name=phase_name,
-                illumination_percent=round(illumination, 1),
-                age_days=round(degree_sep / 360 * 29.53, 1),  # Approximate moon age
-            ),
-            solstices_current_year=SolsticeData(
-                summer_solstice=summer_sol_date,
-                winter_solstice=winter_sol_date,
-                hemisphere=hemisphere,
-            ),
+        content = _compute_astro(
+            round(lat * 100), round(lon * 100), get_hemisphere(lat), target_date
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Already serialized, FastAPI skips the response_model for a Response
+    return Response(content=content, media_type="application/json")
+
+
+@app.get("/astro-calendar", response_model=List[CalendarDay], tags=["Astronomy"])
+def get_astro_calendar(
+    lat: float = Query(
+        ..., description="Latitude in decimal degrees"
+    ),
+    lon: float = Query(
+        ..., description="Longitude in decimal degrees"
+    ),
+    start: str = Query(
+        ..., description="First date in YYYY-MM-DD format"
+    ),
+    end: str = Query(
+        ..., description="Last date (inclusive) in YYYY-MM-DD format"
+    ),
+):
+    """
+    Calculate Sun and Moon rise/set times for every day of a date range.
+    Only events within each UTC day are reported. All days are computed
+    together, vectorized with Skyfield.
+    """
+    try:
+        start_date = parse_date(start)
+        end_date = parse_date(end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    days = (end_date - start_date).days + 1
+    if days < 1:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if days > _CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Date range is limited to {_CALENDAR_MAX_DAYS} days"
+        )
+
+    try:
+        ts, eph, first_date, last_date = get_skyfield()
+    except Exception as e:
+        raise HTTPException(
+            status_code=503, detail=f"Calendar ephemeris is not available: {str(e)}"
         )
 
+    out_of_range = HTTPException(
+        status_code=400,
+        detail=f"Calendar dates must be between {first_date.isoformat()} and {last_date.isoformat()}",
+    )
+    if start_date.date() < first_date or end_date.date() > last_date:
+        raise out_of_range
+
+    try:
+        topos = eph["earth"] + wgs84.latlon(lat, lon)
+
+        def observer_at(minutes):
+            t = ts.utc(start_date.year, start_date.month, start_date.day, 0, minutes)
+            return topos.at(t)
+
+        # One time array covering the whole range (midnight to midnight, UTC)
+        minutes = np.arange(days * 1440 // _CALENDAR_STEP_MINUTES + 1) * _CALENDAR_STEP_MINUTES
+        observer = observer_at(minutes)
+
+        times = {}
+        for name in ("sun", "moon"):
+            body, radius_km = eph[name], _CALENDAR_BODY_RADIUS_KM[name]
+            times[name] = get_calendar_times(
+                _calendar_height(observer, body, radius_km),
+                lambda m: _calendar_height(observer_at(m), body, radius_km),
+                start_date,
+                days,
+            )
+
+        return [
+            CalendarDay(
+                date=(start_date + timedelta(days=day)).date().isoformat(),
+                sun_times=CelestialBodyTimes(**times["sun"][day]),
+                moon_times=CelestialBodyTimes(**times["moon"][day]),
+            )
+            for day in range(days)
+        ]
+
+    except EphemerisRangeError:
+        raise out_of_range
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 